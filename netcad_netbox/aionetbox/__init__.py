@@ -14,5 +14,6 @@
 
 from .netbox_client import NetboxClient
 from .pager import Pager
+from .nb_dev_cache import DeviceRecordCache
 from .nb_dyninv import NetBoxDynamicInventory
 from .nb_fetch import fetch_devices_by_name
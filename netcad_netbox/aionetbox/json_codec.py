@@ -0,0 +1,44 @@
+#  Copyright 2023 Jeremy Schulman
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# =============================================================================
+# This file contains the JSON codec functions used by the NetBox client.  The
+# optional orjson package, part of the "speedups" extra, is used when
+# installed since it is considerably faster than the standard library json
+# module; both when parsing the swagger spec files, which are several MB, and
+# when decoding the API response bodies.
+#
+# json_loads accepts bytes or str.  json_dumps returns bytes, and is None when
+# orjson is not installed, so that the Caller can instead use the httpx "json"
+# request body encoding.
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["json_loads", "json_dumps"]
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+try:
+    from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:
+    from json import loads as json_loads
+
+    json_dumps = None
@@ -0,0 +1,208 @@
+#  Copyright 2023 Jeremy Schulman
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# =============================================================================
+# This file contains the definition of an on-disk cache of NetBox device
+# records.  Inventory builds are often re-run many times against an unchanged
+# NetBox; rather than paging the entire device list on each run, the cache
+# validates the stored records with a few, one-record requests.  NetBox does
+# not provide ETags on list endpoints, so the "validator" is formed from the
+# total count of matching devices and the most recent "last_updated" value.
+# Any device added, removed, or changed will alter one of those two values.
+#
+# The device records also embed values of related objects, for example the
+# primary IP address and the platform slug, and changing those objects does
+# not change the device "last_updated" value.  So the validator also includes
+# the count and the most recent "last_updated" value of each of the
+# RELATED_LIST_OPS object types; the count detects a deleted object, which
+# does not alter any "last_updated" value.  Changes to other related objects,
+# for example a tenant or rack name, are not detected; use `clear` to discard
+# the cached records.
+# =============================================================================
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Optional
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .netbox_client import NetboxClient
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["DeviceRecordCache"]
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class DeviceRecordCache:
+    """
+    An on-disk cache of NetBox device records, keyed by the NetBox server URL
+    and the /dcim/devices query parameters.  For example:
+
+        cache = DeviceRecordCache()
+        records, validator = await cache.load(api, params)
+        if records is None:
+            records = await Pager(api).all(api.op.dcim_devices_list, params=params)
+            cache.save(api, params, validator, records)
+    """
+
+    DEFAULT_CACHE_DIR = Path.home() / ".cache" / "netcad-netbox" / "devices"
+
+    # the list operations of the related object types whose values are
+    # embedded in the device records.
+
+    RELATED_LIST_OPS = (
+        "ipam_ip_addresses_list",
+        "dcim_platforms_list",
+        "dcim_device_types_list",
+        "dcim_device_roles_list",
+        "dcim_sites_list",
+    )
+
+    def __init__(self, cache_dir: Optional[Path | str] = None):
+        """
+        Constructor for the device record cache.
+
+        Parameters
+        ----------
+        cache_dir:
+            The directory used to store the cache files.  If not provided,
+            then the DEFAULT_CACHE_DIR is used.
+        """
+        self.cache_dir = Path(cache_dir or self.DEFAULT_CACHE_DIR)
+
+    async def load(
+        self, api: NetboxClient, params: dict
+    ) -> tuple[Optional[list[dict]], list]:
+        """
+        Returns the cached device records if they are still valid, and the
+        current validator value.  If there are no cached records, or the
+        records are stale, then None is returned in place of the records; and
+        the Caller should fetch the records and then call `save`.
+
+        Parameters
+        ----------
+        api:
+            The NetBox API client
+
+        params:
+            The NetBox /dcim/devices query parameters
+        """
+        validator = await self.get_validator(api, params)
+
+        try:
+            cached = json.loads(self._cache_file(api, params).read_text())
+        except (OSError, ValueError):
+            return None, validator
+
+        if cached.get("validator") != validator:
+            return None, validator
+
+        return cached["records"], validator
+
+    def save(
+        self, api: NetboxClient, params: dict, validator: list, records: list[dict]
+    ):
+        """
+        Stores the device records into the cache.
+
+        Parameters
+        ----------
+        api:
+            The NetBox API client
+
+        params:
+            The NetBox /dcim/devices query parameters
+
+        validator:
+            The validator value, as returned by `load`.
+
+        records:
+            The NetBox device records
+        """
+        cache_file = self._cache_file(api, params)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(dict(validator=validator, records=records)))
+
+    def clear(self):
+        """
+        Removes all of the cached device records, so that the next `load` of
+        any query returns None.
+        """
+        for cache_file in self.cache_dir.glob("*.json"):
+            cache_file.unlink(missing_ok=True)
+
+    @classmethod
+    async def get_validator(cls, api: NetboxClient, params: dict) -> list:
+        """
+        Returns the validator value for the given query; the count and the
+        most recent last-updated value of the devices, and then of each related
+        object type, using concurrent requests that each return at most one
+        record.  Any related list operation that is not defined by the API
+        spec in use is not included.
+
+        Notes
+        -----
+        On PostgreSQL a descending order places NULL values first.  NetBox
+        sets "last_updated" on every save, so a NULL value only exists for
+        records that were written without a save, for example by a database
+        migration or a raw SQL import.  If any such record exists, then the
+        "most recent" value is NULL and later updates of that object type are
+        not detected, only additions and deletions via the count; use `clear`
+        to discard the cached records in that case.
+        """
+        latest = dict(limit=1, offset=0, ordering="-last_updated")
+
+        responses = await asyncio.gather(
+            api.op.dcim_devices_list(params={**params, **latest}),
+            *(
+                getattr(api.op, oper_id)(params=latest)
+                for oper_id in cls.RELATED_LIST_OPS
+                if oper_id in api.op.oper_id_specs
+            ),
+        )
+
+        bodies = list()
+        for res in responses:
+            res.raise_for_status()
+            bodies.append(api.response_json(res))
+
+        return [
+            value
+            for body in bodies
+            for value in (
+                body["count"],
+                next(iter(body["results"]), {}).get("last_updated"),
+            )
+        ]
+
+    def _cache_file(self, api: NetboxClient, params: dict) -> Path:
+        """returns the cache file path for the given server and query"""
+        key = json.dumps([str(api.base_url), params], sort_keys=True, default=str)
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
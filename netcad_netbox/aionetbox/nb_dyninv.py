@@ -2,8 +2,17 @@
 # System Imports
 # -----------------------------------------------------------------------------
 
-from typing import Sequence, Callable, Type, Coroutine
+from typing import Sequence, Callable, Type, Optional, AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
 from ipaddress import IPv4Interface
+from pathlib import Path
+import asyncio
+import json
+import sys
+import time
 
 # -----------------------------------------------------------------------------
 # Public Imports
@@ -17,6 +26,8 @@ from netcad.device.profiles import InterfaceL3
 # -----------------------------------------------------------------------------
 
 from netcad_netbox.aionetbox import NetboxClient, Pager
+from netcad_netbox.aionetbox import nb_fetch
+from netcad_netbox.aionetbox.nb_dev_cache import DeviceRecordCache
 
 # -----------------------------------------------------------------------------
 # Exports
@@ -36,32 +47,90 @@ __all__ = ["NetBoxDynamicInventory"]
 # instance of the NetBoxDynamicInventory.
 
 CustomFetchFuncType = Callable[
-    ["NetBoxDynamicInventory", ...],  # function signature
-    Coroutine[None, None, None],  # is a coroutine that does not yield,send,return
+    ...,  # function signature, first argument is the NetBoxDynamicInventory
+    AsyncIterator[Sequence[dict]],  # is an async generator of device records
 ]
 
 NetBoxDeviceID = int
 
 
+@lru_cache(maxsize=None)
+def _device_class(device_type: str) -> Type[DeviceNonExclusive]:
+    """
+    Returns the Device class for the given NetBox device_type slug value.  The
+    classes are memoized at module scope so that all inventory instances share
+    the same class for the same device-type.
+    """
+    return type(
+        device_type, (DeviceNonExclusive,), dict(device_type=device_type.upper())
+    )
+
+
+@lru_cache(maxsize=4096)
+def _parse_ipif(address: str) -> IPv4Interface:
+    """
+    Returns the IPv4Interface for the given address string.  IPv4Interface
+    instances are immutable, so the parsed value is safely shared by devices
+    that have the same address, for example across inventory rebuilds.
+    """
+    return IPv4Interface(address)
+
+
 class NetBoxDynamicInventory:
     """
     This class is used to create a NetCAD list of Device instances using Netbox
     device records as the source of truth.  The Devices are "non-exclusive" in
     so that actions can be performed in a partial-merge configuration mode.
 
-    The NetBoxDynamicInventory supports a context manager; it is to
-    automatically call the build_inventory method once the Caller has completed
-    their "fetch" methods.  For example:
+    The NetBoxDynamicInventory supports a context manager.  For example:
 
     async with NetBoxDynamicInventory() as dyninv:
         await dyninv.fetch_devices(site="HQ")
 
-    Upon exiting the context manager, the inventory will be built into the
-    'inventory' attribute.  The Caller must then add those inventory to the design.
+    The Device instances are built into the 'inventory' attribute as each set
+    of device records is fetched, so there is no further work done upon
+    exiting the context manager.  The Caller must then add those inventory to
+    the design.
+
+    While inside the context manager, all fetch methods share a single
+    NetboxClient instance so that the underlying connection pool (TCP + TLS
+    sessions) is reused across calls.  Fetch methods called outside of the
+    context manager will use a temporary client.
     """
 
-    def __init__(self):
-        """Constructor for the NetBoxDynamicInventory class."""
+    def __init__(
+        self,
+        cache_dir: Optional[Path | str | bool] = None,
+        max_concurrency: int = nb_fetch.DEFAULT_FETCH_CONCURRENCY,
+        cache_ttl: float = 0,
+        **client_kwargs,
+    ):
+        """
+        Constructor for the NetBoxDynamicInventory class.
+
+        Parameters
+        ----------
+        cache_dir:
+            When provided, the device records retrieved by `fetch_devices` are
+            stored in an on-disk cache in this directory and reused on
+            subsequent runs for as long as NetBox reports no device changes.
+            When True, the default cache directory is used.  See
+            DeviceRecordCache for the changes that are detected, and its
+            `clear` method to discard the cached records.
+
+        max_concurrency:
+            The maximum number of concurrent fetch queries issued by this
+            inventory, for example by `fetch_devices_many`.
+
+        cache_ttl:
+            When non-zero, the number of seconds for which the records of a
+            `fetch_devices` call are reused, in memory, by a subsequent call
+            with the same query parameters.
+
+        client_kwargs:
+            Any NetboxClient constructor kwargs, for example the httpx
+            connection pool `limits` or `http2` setting.
+        """
 
         # Uses the NetBox device record "id" field (int) as the key into the
         # dictionary so that we have a unique set of device recoreds.  This
@@ -78,11 +147,83 @@ class NetBoxDynamicInventory:
 
         self.inventory: dict[DeviceNonExclusive, NetBoxDeviceID] = dict()
 
+        # A read-only snapshot of the inventory devices; built on first access
+        # and discarded whenever new devices are added to the inventory.
+
+        self._devices_view: Optional[tuple[DeviceNonExclusive, ...]] = None
+
         # The 'device_types' dictionary is used to map the NetBox device type
         # values to the Device class that will be created.
 
         self.device_types: dict[str, type] = dict()
 
+        # The NetBox interface and IP address records of each device, keyed by
+        # the NetBox device record "id" field; populated by the method
+        # `fetch_devices_expanded`.
+
+        self.device_interfaces: dict[NetBoxDeviceID, list[dict]] = dict()
+        self.device_ipaddrs: dict[NetBoxDeviceID, list[dict]] = dict()
+
+        # The NetBox API client that is shared by all fetch methods while the
+        # Caller is within the context manager, or while any fetch method is
+        # running.  The client is closed when its last user exits.
+
+        self._api: Optional[NetboxClient] = None
+        self._api_users = 0
+        self._api_lock = asyncio.Lock()
+        self._client_kwargs = client_kwargs
+
+        # The concurrency limit shared by all fan-out fetch methods of this
+        # inventory, so that NetBox is not overwhelmed by concurrent calls.
+
+        self.max_concurrency = max_concurrency
+        self._fetch_s4 = asyncio.Semaphore(max_concurrency)
+
+        # The optional in-memory cache of device records used by fetch_devices;
+        # key=query-params, value=(monotonic-timestamp, records).
+
+        self.cache_ttl = cache_ttl
+        self._resp_cache: dict[str, tuple[float, list[dict]]] = dict()
+
+        # The optional on-disk cache of device records used by fetch_devices.
+
+        self._dev_cache: Optional[DeviceRecordCache] = None
+        if cache_dir:
+            self._dev_cache = DeviceRecordCache(
+                cache_dir if not isinstance(cache_dir, bool) else None
+            )
+
+    # -------------------------------------------------------------------------
+    #
+    #                                   Properties
+    #
+    # -------------------------------------------------------------------------
+
+    @property
+    def api(self) -> NetboxClient:
+        """
+        Returns the NetBox client shared by all fetch methods.  The client is
+        only available while within the context manager or a fetch method.
+        """
+        if self._api is None:
+            raise RuntimeError(
+                "NetBoxDynamicInventory API client used outside of context manager"
+            )
+
+        return self._api
+
+    @property
+    def devices(self) -> tuple[DeviceNonExclusive, ...]:
+        """
+        Returns a read-only snapshot of the Device instances in the inventory.
+        The same tuple is returned until new devices are added, so Callers do
+        not need to make defensive copies while iterating.
+        """
+        if self._devices_view is None:
+            self._devices_view = tuple(self.inventory)
+
+        return self._devices_view
+
     # -------------------------------------------------------------------------
     #
     #                                   Public Methods
@@ -105,14 +246,185 @@ class NetBoxDynamicInventory:
         -------
         The list of retrieve device records
         """
-        async with NetboxClient() as api:
-            records = await Pager(api).all(api.op.dcim_devices_list, params=params)
+        # the device config-context is not used by the inventory, and is by far
+        # the largest part of each device record; so exclude it unless the
+        # Caller has asked otherwise.
+
+        params.setdefault("exclude", "config_context")
+
+        # if the same query was made recently, then reuse those records, which
+        # are already in the inventory.
+
+        if self.cache_ttl:
+            cache_key = json.dumps(params, sort_keys=True, default=str)
+            ts, records = self._resp_cache.get(cache_key, (0.0, None))
+            if records is not None and (time.monotonic() - ts) < self.cache_ttl:
+                return records
+
+        records = await self._fetch_devices(params)
+
+        if self.cache_ttl:
+            self._resp_cache[cache_key] = (time.monotonic(), records)
+
+        return records
+
+    async def fetch_devices_many(self, params_list: Sequence[dict]) -> Sequence[dict]:
+        """
+        This function is used to retrieve device records for a list of
+        different NetBox API query parameters, for example one per site.  The
+        queries are issued concurrently, bounded by `max_concurrency`, rather
+        than one after the other.  The resulting device records are added to
+        the inventory.
+
+        Parameters
+        ----------
+        params_list
+            The list of NetBox /dcim/device query parameters, one per query.
+
+        Returns
+        -------
+        The list of retrieve device records
+        """
+
+        async def fetch_one(params: dict) -> Sequence[dict]:
+            """fetch the device records for one set of query parameters"""
+            async with self._fetch_s4:
+                return await self.fetch_devices(**params)
+
+        async with self._client():
+            gathered = await asyncio.gather(*(fetch_one(p) for p in params_list))
+
+        return [rec for records in gathered for rec in records]
+
+    async def fetch_devices_expanded(self, **params) -> Sequence[dict]:
+        """
+        This function is used to retrieve a list of device records, as with
+        `fetch_devices`, and then also retrieve the interface and IP address
+        records of those devices.  The related records are retrieved using
+        multi-value "device_id" filter requests of up to FILTER_CHUNK_SZ
+        devices each, issued concurrently, rather than per device.  The
+        related records are stored into the `device_interfaces` and
+        `device_ipaddrs` attributes.
+
+        Parameters
+        ----------
+        params
+            The NetBox /dcim/device query parameters.
+
+        Returns
+        -------
+        The list of retrieve device records
+        """
+        chunk_sz = nb_fetch.FILTER_CHUNK_SZ
+
+        async with self._client() as api:
+            records = await self.fetch_devices(**params)
+            dev_ids = [rec["id"] for rec in records]
+
+            async def fetch_related(call: Callable, ids: list[int]) -> list[dict]:
+                """fetch the related records for the given chunk of device ids"""
+                async with self._fetch_s4:
+                    return await Pager(api).all(call, params=dict(device_id=ids))
+
+            chunks = [
+                dev_ids[offset : offset + chunk_sz]
+                for offset in range(0, len(dev_ids), chunk_sz)
+            ]
+
+            if_chunks, ip_chunks = await asyncio.gather(
+                asyncio.gather(
+                    *(fetch_related(api.op.dcim_interfaces_list, c) for c in chunks)
+                ),
+                asyncio.gather(
+                    *(fetch_related(api.op.ipam_ip_addresses_list, c) for c in chunks)
+                ),
+            )
+
+        for dev_id in dev_ids:
+            self.device_interfaces[dev_id] = list()
+            self.device_ipaddrs[dev_id] = list()
+
+        for if_rec in chain.from_iterable(if_chunks):
+            self.device_interfaces[if_rec["device"]["id"]].append(if_rec)
+
+        for ip_rec in chain.from_iterable(ip_chunks):
+            self.device_ipaddrs[ip_rec["assigned_object"]["device"]["id"]].append(
+                ip_rec
+            )
+
+        return records
+
+    async def fetch_devices_by_name(
+        self, names: Sequence[str], **params
+    ) -> Sequence[dict]:
+        """
+        This function is used to retrieve the device records for the given
+        list of device hostnames.  The resulting device records are added to
+        the inventory.  If any of the devices are not found in NetBox, then a
+        RuntimeError is raised.
+
+        Parameters
+        ----------
+        names
+            The list of device hostnames
+
+        params
+            Any other NetBox /dcim/device query parameters.
+
+        Returns
+        -------
+        The list of retrieve device records
+        """
+        # as with fetch_devices, the config-context is not used by the
+        # inventory; so exclude it unless the Caller has asked otherwise.
+
+        params.setdefault("exclude", "config_context")
+
+        async with self._client() as api:
+            records = await nb_fetch.fetch_devices_by_name(
+                api, names, semaphore=self._fetch_s4, **params
+            )
 
         self.add_netbox_devices(records)
 
         return records
 
-    def add_netbox_devices(self, records: Sequence[dict]) -> Sequence[DeviceNonExclusive]:
+    async def custom_fetch(
+        self, fetching_func: CustomFetchFuncType, *args, **kwargs
+    ) -> Sequence[dict]:
+        """
+        This function is used to retrieve device records using a Caller
+        provided async generator function.  The function is called with this
+        inventory instance, so that it can use the shared `api` client, and any
+        other given args.  Each list of records yielded by the function is
+        added to the inventory.
+
+        Parameters
+        ----------
+        fetching_func:
+            The Caller async generator function that yields lists of NetBox
+            device records.
+
+        Other Parameters
+        ----------------
+        Any args and kwargs are passed to the fetching_func.
+
+        Returns
+        -------
+        The list of retrieve device records
+        """
+        records = list()
+
+        async with self._client():
+            async for nb_recs in fetching_func(self, *args, **kwargs):
+                self.add_netbox_devices(nb_recs)
+                records.extend(nb_recs)
+
+        return records
+
+    def add_netbox_devices(
+        self, records: Sequence[dict]
+    ) -> Sequence[DeviceNonExclusive]:
         """
         Helper function to add device records to the internal list of NetBox
         inventory.  Uses the NetBox device record "id" field as the key into the
@@ -124,42 +436,60 @@ class NetBoxDynamicInventory:
         ----------
         records
             The list of NetBox device records
+
+        Returns
+        -------
+        The list of Device instances that were added to the inventory.
         """
-        devices = dict()
+        devices: list[DeviceNonExclusive] = list()
+
+        # bind the instance attributes used in the loop to locals since this
+        # loop runs once per device record.
+
+        netbox_devices = self.netbox_devices
+        inventory = self.inventory
+        get_device_type = self._get_device_type
+        intern = sys.intern
+        get_fields = itemgetter("name", "device_type", "platform", "primary_ip")
+        interface_l3 = InterfaceL3
+        parse_ipif = _parse_ipif
 
         for nb_dev_rec in records:
             # if the device record already exists in the inventory, skip it.
 
-            if (nb_id := nb_dev_rec["id"]) in self.netbox_devices:
+            if (nb_id := nb_dev_rec["id"]) in netbox_devices:
                 continue
 
             # create the Device instance based on the dynamically created
             # device_type associated with the device_type slug value.
 
-            self.netbox_devices[nb_id] = nb_dev_rec
+            netbox_devices[nb_id] = nb_dev_rec
+            name, nb_dev_type, nb_platform, nb_pri_ip = get_fields(nb_dev_rec)
 
-            device_type = self._get_device_type(nb_dev_rec["device_type"]["slug"])
-            device = device_type(
-                name=nb_dev_rec["name"], os_name=nb_dev_rec["platform"]["slug"]
-            )
+            # the slug values are repeated across many device records, so
+            # intern them; the Devices then share a single string object and
+            # the device-type lookups reduce to identity compares.
+
+            device_type = get_device_type(intern(nb_dev_type["slug"]))
+            device = device_type(name=name, os_name=intern(nb_platform["slug"]))
 
             # create the primary IP interface so that the device can be reached
             # using NetCAM.
 
             pri_intf = device.interfaces["primary_interface"]
-            pri_intf.profile = InterfaceL3(
-                if_ipaddr=IPv4Interface(nb_dev_rec["primary_ip"]["address"])
-            )
+            pri_intf.profile = interface_l3(if_ipaddr=parse_ipif(nb_pri_ip["address"]))
             device.set_primary_ip_interface(pri_intf)
 
             # add the Device instance to the inventory dictionary with the
             # back-reference to the NetBox device record via the "id" field.
 
-            devices[device] = nb_id
+            inventory[device] = nb_id
+            devices.append(device)
 
-        self.inventory.update(devices)
-        return devices
+        if devices:
+            self._devices_view = None
 
+        return devices
 
     # -------------------------------------------------------------------------
     #
@@ -167,11 +497,77 @@ class NetBoxDynamicInventory:
     #
     # -------------------------------------------------------------------------
 
+    async def _fetch_devices(self, params: dict) -> list[dict]:
+        """
+        Retrieves the device records for the given query parameters, either
+        from the on-disk device cache, if used, or from NetBox.  The device
+        records are added to the inventory.
+        """
+        async with self._client() as api:
+            # if the device cache is used and the cached records are still
+            # valid, then use those records rather than fetching them again.
+
+            if self._dev_cache:
+                records, validator = await self._dev_cache.load(api, params)
+                if records is not None:
+                    self.add_netbox_devices(records)
+                    return records
+
+            records = list()
+
+            # add each page of device records to the inventory as the page
+            # arrives rather than waiting for all pages to be retrieved.
+
+            async for page in Pager(api).paginate(
+                api.op.dcim_devices_list, params=dict(params)
+            ):
+                self.add_netbox_devices(page)
+                records.extend(page)
+
+            if self._dev_cache:
+                self._dev_cache.save(api, params, validator, records)
+
+        return records
+
+    @asynccontextmanager
+    async def _client(self) -> AsyncIterator[NetboxClient]:
+        """
+        Yields the shared NetBox client.  When used outside of the context
+        manager, the client is opened by the first user, shared by any nested
+        or concurrent fetch calls, and closed when the last of them exits.
+        """
+        api = await self._acquire_client()
+        try:
+            yield api
+        finally:
+            await self._release_client()
+
+    async def _acquire_client(self) -> NetboxClient:
+        """opens the shared NetBox client, if needed, and counts the user"""
+        async with self._api_lock:
+            if self._api is None:
+                self._api = await NetboxClient(**self._client_kwargs).__aenter__()
+
+            self._api_users += 1
+            return self._api
+
+    async def _release_client(self, exc_type=None, exc_val=None, exc_tb=None):
+        """uncounts the user, and closes the shared client upon the last one"""
+        async with self._api_lock:
+            self._api_users -= 1
+            if self._api_users:
+                return
+
+            api, self._api = self._api, None
+
+        await api.__aexit__(exc_type, exc_val, exc_tb)
+
     def _get_device_type(self, device_type: str) -> Type[DeviceNonExclusive]:
         """
         This function is used to retrieve the Device class based on the NetBox
-        device record device_type slug value.  The Device class is created if
-        it does not already exist in the 'device_types' dictionary.
+        device record device_type slug value.  The Device class is obtained
+        from the module-level class cache and recorded in the 'device_types'
+        dictionary.
 
         Parameters
         ----------
@@ -182,15 +578,11 @@ class NetBoxDynamicInventory:
         -------
         The Device class that is associated with the device_type value.
         """
-
-        if device_type not in self.device_types:
-            self.device_types[device_type] = type(
-                device_type,
-                (DeviceNonExclusive,),
-                dict(device_type=device_type.upper()),
-            )
-
-        return self.device_types[device_type]
+        try:
+            return self.device_types[device_type]
+        except KeyError:
+            dev_cls = self.device_types[device_type] = _device_class(device_type)
+            return dev_cls
 
     # -------------------------------------------------------------------------
     #
@@ -198,6 +590,15 @@ class NetBoxDynamicInventory:
     #
     # -------------------------------------------------------------------------
 
+    async def __aenter__(self):
+        """opens the NetBox client shared by all fetch methods"""
+        await self._acquire_client()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """closes the shared NetBox client, once no fetch method is using it"""
+        await self._release_client(exc_type, exc_val, exc_tb)
+
     def __len__(self):
         """returns the number of netbox currently in the inventory."""
         return len(self.inventory)
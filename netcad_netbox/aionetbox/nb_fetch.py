@@ -12,11 +12,27 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+# =============================================================================
+# This file contains the NetBox record fetching functions.  Each function takes
+# an already open NetboxClient rather than creating one, so that the Caller
+# can reuse a single client, and so its connection pool (TCP + TLS sessions),
+# across all fetch calls.  For example:
+#
+#   async with NetboxClient() as api:
+#       site_rec = await fetch_site(api, "hq")
+#       devices = await fetch_devices_by_name(api, ["sw1", "sw2"])
+#
+# Opening a new client per call results in a new TCP connect and TLS handshake
+# per call, which dominates the latency of the small lookup requests.
+# =============================================================================
+
 # -----------------------------------------------------------------------------
 # System Imports
 # -----------------------------------------------------------------------------
 
-from typing import Sequence
+from typing import Sequence, Callable, Awaitable, Optional
+from functools import wraps
+from weakref import WeakKeyDictionary
 import asyncio
 
 # -----------------------------------------------------------------------------
@@ -24,7 +40,6 @@ import asyncio
 # -----------------------------------------------------------------------------
 
 from httpx import Response
-from first import first
 
 # -----------------------------------------------------------------------------
 # Private Imports
@@ -52,64 +67,124 @@ __all__ = [
 #
 # -----------------------------------------------------------------------------
 
+# the default maximum number of concurrent requests issued by the fetch
+# functions that fan-out over a list of values.
+
+DEFAULT_FETCH_CONCURRENCY = 16
+
+# the maximum number of values passed in a single multi-value filter, for
+# example name=a&name=b&...; so that the request URL length remains bounded.
+
+FILTER_CHUNK_SZ = 100
+
+
+def _memoize_fetch(fetch_func: Callable[..., Awaitable[dict]]):
+    """
+    Decorator used to memoize the single record lookup functions, per NetBox
+    client instance.  Concurrent lookups of the same value share the one
+    in-flight request, and subsequent lookups return the same record without
+    another request.  Failed lookups are not cached so that they can be
+    retried.  The cache is released along with the client instance.
+
+    The cached records are shared by all Callers, and must not be modified.
+    """
+    cache: WeakKeyDictionary[
+        NetboxClient, dict[tuple, asyncio.Future]
+    ] = WeakKeyDictionary()
+
+    @wraps(fetch_func)
+    async def wrapper(api: NetboxClient, *args, **kwargs) -> dict:
+        # the lookup functions take a single value, given either positionally
+        # or by keyword.
+
+        key = (*args, *kwargs.values())
+        api_cache = cache.setdefault(api, dict())
+
+        if (task := api_cache.get(key)) is None:
+            task = api_cache[key] = asyncio.ensure_future(
+                fetch_func(api, *args, **kwargs)
+            )
+
+        try:
+            # shield the request so that a cancelled Caller does not cancel
+            # the lookup for any other Caller awaiting the same value.
+            return await asyncio.shield(task)
+
+        except Exception:
+            if api_cache.get(key) is task:
+                del api_cache[key]
+            raise
+
+    return wrapper
+
+
+async def _fetch_one(api: NetboxClient, call: Callable, params: dict) -> dict | None:
+    """
+    Returns the first NetBox record from the given list API call, or None if
+    there are no matching records.
+    """
+    res: Response = await call(params=params)
+    res.raise_for_status()
+
+    if results := api.response_json(res)["results"]:
+        return results[0]
+
+    return None
+
 
+@_memoize_fetch
 async def fetch_site(api: NetboxClient, site_slug: str):
     """
     This function is used to return the NetBox Site record assocaited to the
     site_slug.  If the value is not found then this function will raise a
     RuntimeError.
     """
-    res: Response = await api.op.dcim_sites_list(params=dict(slug=site_slug))
-    res.raise_for_status()
-
-    if site_rec := first(res.json()["results"]):
+    if site_rec := await _fetch_one(api, api.op.dcim_sites_list, dict(slug=site_slug)):
         return site_rec
 
     raise RuntimeError(f"NetBox missing site {site_slug}, please resolve.")
 
 
+@_memoize_fetch
 async def fetch_platform(api: NetboxClient, platform: str):
     """
     This function is used to return the NetBox Platform record assocaited to
     the platform (slug).  If the value is not found then this function will
     raise a RuntimeError.
     """
-
-    res: Response = await api.op.dcim_platforms_list(params=dict(slug=platform))
-    res.raise_for_status()
-
-    if platform_rec := first(res.json()["results"]):
+    if platform_rec := await _fetch_one(
+        api, api.op.dcim_platforms_list, dict(slug=platform)
+    ):
         return platform_rec
 
     raise RuntimeError(f"NetBox missing platform {platform}, please resolve.")
 
 
+@_memoize_fetch
 async def fetch_device_role(api: NetboxClient, device_role: str):
     """
     This function is used to return the NetBox Device-Role record assocaited to
     the device_role (slug).  If the value is not found then this function will
     raise a RuntimeError.
     """
-
-    res: Response = await api.op.dcim_device_roles_list(params=dict(slug=device_role))
-    res.raise_for_status()
-
-    if device_role_rec := first(res.json()["results"]):
+    if device_role_rec := await _fetch_one(
+        api, api.op.dcim_device_roles_list, dict(slug=device_role)
+    ):
         return device_role_rec
 
     raise RuntimeError(f"NetBox missing device-role {device_role}, please resolve.")
 
 
+@_memoize_fetch
 async def fetch_device_type(api: NetboxClient, device_type: str):
     """
     This function is used to return the NetBox Device-Type record assocaited to
     the device_type (model name, not slug).  If the value is not found then
     this function will raise a RuntimeError.
     """
-
-    res: Response = await api.op.dcim_device_types_list(params=dict(model=device_type))
-    res.raise_for_status()
-    if device_type_rec := first(res.json()["results"]):
+    if device_type_rec := await _fetch_one(
+        api, api.op.dcim_device_types_list, dict(model=device_type)
+    ):
         return device_type_rec
 
     raise RuntimeError(f"NetBox missing device-type {device_type}, please resolve.")
@@ -137,10 +212,16 @@ async def fetch_device_interfaces(api: NetboxClient, device_id: int) -> list[dic
 
 
 async def fetch_devices_by_name(
-    api: NetboxClient, names: Sequence[str], **params
+    api: NetboxClient,
+    names: Sequence[str],
+    max_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    **params,
 ) -> list[dict]:
     """
-    Fetch netbox devices give a list of hostnames.
+    Fetch netbox devices give a list of hostnames.  The names are batched into
+    multi-value "name" filter requests of up to FILTER_CHUNK_SZ names each.
+    The requests are issued concurrently, bounded by max_concurrency.
 
     Parameters
     ----------
@@ -150,6 +231,14 @@ async def fetch_devices_by_name(
     names:
         A list of device hostnames to retrieve from NetBox.
 
+    max_concurrency:
+        The maximum number of requests in-flight at any one time.
+
+    semaphore:
+        When provided, the semaphore that bounds the requests in place of
+        max_concurrency; so that the requests share a concurrency limit with
+        the Caller's other fetches.
+
     Other Parameters
     ----------------
     Any other NetBox API supported parameters.  For example, getting only
@@ -159,10 +248,26 @@ async def fetch_devices_by_name(
     -------
     List of NetBox device records.
     """
+    # remove any duplicate names, preserving order, so that each name is
+    # requested only once across all chunks.
+
+    names = list(dict.fromkeys(names))
+    sem = semaphore or asyncio.Semaphore(max_concurrency)
+
+    async def fetch_chunk(chunk: Sequence[str]) -> list[dict]:
+        """fetch the device records for the given chunk of names"""
+        async with sem:
+            return await Pager(api).all(
+                api.op.dcim_devices_list, params=dict(name=list(chunk), **params)
+            )
+
     gathered = await asyncio.gather(
-        *(api.op.dcim_devices_list(params=dict(name=name, **params)) for name in names)
+        *(
+            fetch_chunk(names[offset : offset + FILTER_CHUNK_SZ])
+            for offset in range(0, len(names), FILTER_CHUNK_SZ)
+        )
     )
-    records = [rec for res in gathered for rec in res.json().get("results", [])]
+    records = [rec for chunk_recs in gathered for rec in chunk_recs]
     found_names = {rec.get("name") for rec in records}
 
     if missing_names := (set(names) - found_names):
@@ -16,8 +16,10 @@
 # System Imports
 # -----------------------------------------------------------------------------
 
-from typing import Optional, Dict, Callable, Any
+from typing import Optional, Dict, Callable, Any, Iterable, Awaitable
+from functools import lru_cache
 import asyncio
+import ssl
 from os import environ
 from pathlib import Path
 
@@ -27,14 +29,23 @@ from pathlib import Path
 
 import httpx
 from httpx import AsyncClient
-from tenacity import retry, wait_exponential, stop_after_attempt
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_exception,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from netcad.logger import get_logger
 
 # -----------------------------------------------------------------------------
 # Private Imports
 # -----------------------------------------------------------------------------
 
+from .json_codec import json_loads
 from .swagger import SwaggerExecutor
-from .pager import Pager
+from .pager import Pager, bounded_calls
 
 # -----------------------------------------------------------------------------
 # Exports
@@ -52,6 +63,67 @@ __all__ = ["NetboxClient"]
 _g_module_dir = Path(__file__).parent
 
 
+@lru_cache(maxsize=None)
+def _ssl_context() -> ssl.SSLContext:
+    """
+    Returns the SSL context shared by all NetboxClient instances, so that the
+    CA certificates are loaded once and TLS sessions can be resumed across the
+    client connections.
+    """
+    return httpx.create_ssl_context()
+
+
+# -----------------------------------------------------------------------------
+# Request retry policy
+# -----------------------------------------------------------------------------
+
+_retry_backoff = wait_random_exponential(multiplier=1, min=1, max=30)
+
+
+def _retry_response(res: httpx.Response) -> bool:
+    """returns True if the request of the given response should be retried"""
+    return NetboxClient._should_retry(res)
+
+
+def _retry_exception(exc: BaseException) -> bool:
+    """
+    Returns True if the request that raised the given exception should be
+    retried; only transport errors of idempotent requests, since a
+    non-idempotent request may have been applied by NetBox.
+    """
+    if not isinstance(exc, httpx.TransportError):
+        return False
+
+    try:
+        return exc.request.method in NetboxClient.IDEMPOTENT_METHODS
+    except RuntimeError:
+        # the exception is not bound to a request
+        return False
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    """
+    Returns the retry backoff time; if NetBox indicates when to retry, then
+    wait at least that long, in addition to the retry backoff.
+    """
+    backoff = _retry_backoff(retry_state)
+    if retry_state.outcome.failed:
+        return backoff
+
+    return backoff + NetboxClient._retry_after(retry_state.outcome.result())
+
+
+def _retry_log(retry_state: RetryCallState):
+    """logs the reason for retrying the request"""
+    if retry_state.outcome.failed:
+        reason = repr(retry_state.outcome.exception())
+    else:
+        res = retry_state.outcome.result()
+        reason = f"{res.status_code} {res.text}"
+
+    get_logger().warning(f"Netbox API error: {reason}, retrying")
+
+
 class NetboxClient(AsyncClient):
     """
     An asyncio client to the NetBox REST API.  Uses OpenAPI/swagger
@@ -60,6 +132,14 @@ class NetboxClient(AsyncClient):
     The following ENV are defined to pass connection information.
         NETBOX_ADDR = https://<url-to-your-netbox-server>
         NETBOX_TOKEN = <API-token-value>
+
+    The following optional ENV are defined to tune the connection pool for the
+    size of the NetBox instance:
+        NETBOX_MAX_CONNECTIONS = <max number of open connections>
+        NETBOX_MAX_KEEPALIVE = <max number of idle keep-alive connections>
+        NETBOX_HTTP2 = "false" to disable HTTP/2 multiplexing
+        NETBOX_VERIFY = "false" to disable TLS certificate verification, for
+                        example for a lab server with a self-signed certificate
     """
 
     ENV_VARS = ["NETBOX_ADDR", "NETBOX_TOKEN"]
@@ -67,6 +147,18 @@ class NetboxClient(AsyncClient):
     DEFAULT_TIMEOUT = 60
     DEFAULT_PAGE_SZ = 1000
     API_RATE_LIMIT = 100
+    DEFAULT_MAX_CONNECTIONS = API_RATE_LIMIT
+    DEFAULT_MAX_KEEPALIVE = API_RATE_LIMIT
+    DEFAULT_KEEPALIVE_EXPIRY = 30.0
+    RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+    MAX_RETRY_AFTER = 60
+
+    # a server error on a non-idempotent request, i.e. POST, may be returned
+    # after NetBox has applied the request; so such a request is only retried
+    # when NetBox explicitly rejects it and indicates when to retry.
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"})
+    NON_IDEMPOTENT_RETRY_STATUS_CODES = frozenset({429, 503})
 
     def __init__(self, base_url=None, token=None, swagger_file=None, **kwargs):
         """
@@ -89,14 +181,44 @@ class NetboxClient(AsyncClient):
         except KeyError as exc:
             raise RuntimeError(f"Missing environment variable: {exc.args[0]}")
 
-        kwargs.setdefault("verify", False)
+        if environ.get("NETBOX_VERIFY", "true").lower() == "false":
+            kwargs.setdefault("verify", False)
+        else:
+            kwargs.setdefault("verify", _ssl_context())
+
         kwargs.setdefault("timeout", self.DEFAULT_TIMEOUT)
         kwargs.setdefault("follow_redirects", True)
+        kwargs.setdefault(
+            "http2", environ.get("NETBOX_HTTP2", "true").lower() != "false"
+        )
+        kwargs.setdefault(
+            "limits",
+            httpx.Limits(
+                max_connections=int(
+                    environ.get("NETBOX_MAX_CONNECTIONS", self.DEFAULT_MAX_CONNECTIONS)
+                ),
+                max_keepalive_connections=int(
+                    environ.get("NETBOX_MAX_KEEPALIVE", self.DEFAULT_MAX_KEEPALIVE)
+                ),
+                keepalive_expiry=self.DEFAULT_KEEPALIVE_EXPIRY,
+            ),
+        )
 
         super().__init__(base_url=f"{url}/api", **kwargs)
 
         self.headers["Authorization"] = f"Token {token}"
-        self._api_s4 = asyncio.Semaphore(self.API_RATE_LIMIT)
+
+        # the API concurrency limit; the number of requests in-flight is
+        # bounded by max_concurrency, which can be changed at runtime via
+        # `set_max_concurrency`.  Every request made through this client, for
+        # example device push and cabling sync, shares the same limit.
+
+        self.max_concurrency = max(
+            1, int(environ.get("NETBOX_CONCURRENCY", self.API_RATE_LIMIT))
+        )
+        self._in_flight = 0
+        self._api_cond = asyncio.Condition()
+
         swagger_file = _g_module_dir / (swagger_file or self.DEFAULT_SWAGGER_FILE)
         self.op = SwaggerExecutor(client=self, specfile=str(swagger_file))
 
@@ -106,6 +228,25 @@ class NetboxClient(AsyncClient):
     #
     # -------------------------------------------------------------------------
 
+    @classmethod
+    def use_uvloop(cls) -> bool:
+        """
+        Sets the asyncio event loop policy to use uvloop, if it is installed.
+        This function must be called at program start, before the event loop
+        is created; for example before calling asyncio.run().
+
+        Returns
+        -------
+        True if the uvloop event loop policy is used, False otherwise.
+        """
+        try:
+            import uvloop
+        except ImportError:
+            return False
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        return True
+
     @staticmethod
     def parse_qfilter(expr: str) -> Dict:
         """
@@ -119,6 +260,11 @@ class NetboxClient(AsyncClient):
         """helper to get results from the response body"""
         return resp["results"]
 
+    @staticmethod
+    def response_json(res: httpx.Response) -> Any:
+        """helper to decode the JSON response body"""
+        return json_loads(res.content)
+
     # -------------------------------------------------------------------------
     #
     #                       httpx.AsyncClient Overloads
@@ -131,22 +277,117 @@ class NetboxClient(AsyncClient):
         API concurrency up to max semaphore value.
         """
 
-        @retry(
-            wait=wait_exponential(multiplier=1, min=4, max=10),
-            stop=stop_after_attempt(3),
-        )
-        async def _do_rqst():
-            """do request with retrying"""
-            res = await super(NetboxClient, self).request(*vargs, **kwargs)
+        async with self._api_cond:
+            try:
+                await self._api_cond.wait_for(
+                    lambda: self._in_flight < self.max_concurrency
+                )
+            except asyncio.CancelledError:
+                # a cancelled waiter may have been the one woken by a released
+                # slot; pass the wakeup on to the next waiter so it is not lost.
+                self._api_cond.notify()
+                raise
+
+            self._in_flight += 1
+
+        try:
+            return await self._request_retrying(*vargs, **kwargs)
+        finally:
+            # shield the release so that a cancelled request still frees its
+            # slot and wakes the next waiting request.
+            await asyncio.shield(self._release_slot())
+
+    # the retry policy is applied once, at class definition, rather than
+    # re-decorating a new function on each request.  When the attempts are
+    # exhausted, the last response is returned, or the last exception raised,
+    # so that the Caller handles the error as with any other response.
+
+    @retry(
+        retry=retry_if_result(_retry_response) | retry_if_exception(_retry_exception),
+        wait=_retry_wait,
+        stop=stop_after_attempt(6),
+        before_sleep=_retry_log,
+        retry_error_callback=lambda retry_state: retry_state.outcome.result(),
+    )
+    async def _request_retrying(self, *vargs, **kwargs) -> httpx.Response:
+        """do request with retrying"""
+        return await super().request(*vargs, **kwargs)
+
+    async def set_max_concurrency(self, value: int):
+        """
+        Sets the maximum number of API requests that are in-flight at any one
+        time.  Any requests waiting on the prior limit are re-evaluated so that
+        an increased limit takes effect immediately; a decreased limit takes
+        effect as the in-flight requests complete.
+        """
+        async with self._api_cond:
+            self.max_concurrency = max(1, value)
+            self._api_cond.notify_all()
+
+    async def batch(
+        self, calls: Iterable[Awaitable], max_concurrency: Optional[int] = None
+    ) -> list:
+        """
+        Runs the given API calls concurrently and returns their results in the
+        same order as the calls.  Each API call is subject to the client
+        concurrency limit and retry policy.  For example:
+
+            dev_recs, site_recs = await nb.batch([
+                nb.op.dcim_devices_list(params=dict(site="hq")),
+                nb.op.dcim_sites_list(params=dict(slug="hq")),
+            ])
+
+        Parameters
+        ----------
+        calls:
+            The API call coroutines, for example `nb.op.<oper_id>(...)`.
+
+        max_concurrency:
+            When provided, the maximum number of this batch's calls that are
+            in-flight at any one time; in addition to the client limit.
+        """
+        if not max_concurrency:
+            return await asyncio.gather(*calls)
+
+        return await asyncio.gather(*bounded_calls(calls, max_concurrency))
+
+    @classmethod
+    def _retry_after(cls, res: httpx.Response) -> float:
+        """
+        Returns the number of seconds given by the response Retry-After header,
+        bounded by MAX_RETRY_AFTER; or 0 if the header is not present or is not
+        given in seconds.
+        """
+        try:
+            retry_after = float(res.headers.get("Retry-After", 0))
+            return max(0.0, min(retry_after, cls.MAX_RETRY_AFTER))
+        except ValueError:
+            return 0
+
+    @classmethod
+    def _should_retry(cls, res: httpx.Response) -> bool:
+        """
+        Returns True if the request of the given response should be retried.
+        Idempotent requests are retried on any RETRY_STATUS_CODES status;
+        other requests only on a NON_IDEMPOTENT_RETRY_STATUS_CODES status that
+        includes a Retry-After header.
+        """
+        if res.status_code not in cls.RETRY_STATUS_CODES:
+            return False
 
-            if res.status_code in [500]:
-                print(f"Netbox API error: {res.text}, retrying")
-                res.raise_for_status()
+        if res.request.method in cls.IDEMPOTENT_METHODS:
+            return True
 
-            return res
+        return (
+            res.status_code in cls.NON_IDEMPOTENT_RETRY_STATUS_CODES
+            and "Retry-After" in res.headers
+        )
 
-        async with self._api_s4:
-            return await _do_rqst()
+    async def _release_slot(self):
+        """release an in-flight request slot and wake the next waiter"""
+        async with self._api_cond:
+            self._in_flight -= 1
+            self._api_cond.notify()
 
     # -------------------------------------------------------------------------
     #
@@ -180,24 +421,36 @@ class NetboxClient(AsyncClient):
         params: dict
             The query-filter parameters
         """
-        params = params or {}
-        params["limit"] = 1
+        # the Caller params are not modified; each request is given its own
+        # params dict formed from the base params.
+
+        base = {k: v for k, v in (params or {}).items() if k not in ("limit", "offset")}
+
+        # the first page is fetched up-front to obtain the total count; so
+        # that result sets that fit within a single page need only the one
+        # request.
 
-        res = await call(params=params)
+        limit = pager.page_sz or self.DEFAULT_PAGE_SZ
+
+        res = await call(params={**base, "offset": 0, "limit": limit})
         res.raise_for_status()
-        body = res.json()
+        body = self.response_json(res)
         pager.total_items = body["count"]
 
-        # create a list of tasks to run concurrently to fetch the data in
-        # pages. NOTE: that we _MUST_ do a params.copy() to ensure that each
-        # task has a unique offset count.  Observed that if copy not used then
-        # all tasks have the same (last) value.
+        async def first_page():
+            """the already decoded first page of records"""
+            return body["results"]
+
+        pager.tasks.append(first_page())
 
-        params["limit"] = pager.page_sz or self.DEFAULT_PAGE_SZ
+        # create a list of tasks to run concurrently to fetch the remaining
+        # data in pages.  Each task is given a unique params dict so that each
+        # has its own offset value.
 
-        for offset in range(0, pager.total_items, params["limit"]):
-            params["offset"] = offset
-            pager.tasks.append(call(params=params.copy()))
+        pager.tasks.extend(
+            call(params={**base, "offset": offset, "limit": limit})
+            for offset in range(limit, pager.total_items, limit)
+        )
 
     def pager_page_data(self, pager: Pager, page: httpx.Response) -> Any:  # noqa
         """
@@ -213,13 +466,17 @@ class NetboxClient(AsyncClient):
 
         page: httpx.Response
             The result of the latest page fetch, which is a httpx.Response
-            instance.
+            instance; or the list of records of the first page, which is
+            decoded during pager setup.
 
         Returns
         -------
         List[Dict] - the list of the Netbox objects for this API call.
         """
+        if isinstance(page, list):
+            return page
+
         if page.is_error:
             raise RuntimeError("Failed to execute next page")
 
-        return page.json()["results"]
+        return self.response_json(page)["results"]
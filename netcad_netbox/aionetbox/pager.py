@@ -27,20 +27,53 @@
 from typing import (
     Protocol,
     Any,
+    Awaitable,
     Coroutine,
     Callable,
+    Iterable,
     List,
     Optional,
     Sequence,
     Iterator,
 )
+from itertools import chain
 import asyncio
 
 # -----------------------------------------------------------------------------
 # Exports
 # -----------------------------------------------------------------------------
 
-__all__ = ["Pager"]
+__all__ = ["Pager", "bounded_calls"]
+
+# -----------------------------------------------------------------------------
+#
+#                                   Helpers
+#
+# -----------------------------------------------------------------------------
+
+
+def bounded_calls(calls: Iterable[Awaitable], max_in_flight: int) -> List[Coroutine]:
+    """
+    Returns the given calls wrapped so that no more than max_in_flight of the
+    calls are awaited at any one time.
+
+    Parameters
+    ----------
+    calls:
+        The awaitables, for example API call coroutines.
+
+    max_in_flight:
+        The maximum number of the calls awaited at any one time.
+    """
+    s4 = asyncio.Semaphore(max_in_flight)
+
+    async def bounded(call: Awaitable):
+        """await the call once the number in-flight is below the limit"""
+        async with s4:
+            return await call
+
+    return [bounded(call) for call in calls]
+
 
 # -----------------------------------------------------------------------------
 #
@@ -56,23 +89,46 @@ class Pager:
     either use the `all()` method or the `paginate()` method to obtain pages of
     data from Client API.
 
+    The page requests are formed up-front during setup, from the total item
+    count, and are then fetched concurrently, up to `max_in_flight` requests
+    at a time; that is, pages are not fetched one after the other by following
+    "next" links.
+
     For example, the NetboxClient is a PagableClient since that class defines
     the methods defined in the PagableClient class.  As such one could then do
     something like:
 
     async with NetboxClient() as nb:
-        async with Pager(nb).all(
+        records = await Pager(nb).all(
             nb.op.dcim_interfaces_list, params=dict(site="dnvr1")
-        ) as pages:
-            await pages
-            for record in pages.data:
-                # do something with each Netbox interface record.
+        )
+        for record in records:
+            # do something with each Netbox interface record.
 
+    Or, to process each page of records as the page arrives:
+
+    async with NetboxClient() as nb:
+        async for page in Pager(nb).paginate(
+            nb.op.dcim_interfaces_list, params=dict(site="dnvr1")
+        ):
+            for record in page:
+                # do something with each Netbox interface record.
     """
 
-    def __init__(self, paging_client: "PagableClient", page_sz: Optional[int] = None):
+    # the default maximum number of page requests that are in-flight at any one
+    # time; the remaining page requests wait until a prior request completes.
+
+    DEFAULT_MAX_IN_FLIGHT = 32
+
+    def __init__(
+        self,
+        paging_client: "PagableClient",
+        page_sz: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+    ):
         """Constructor"""
         self.page_sz = page_sz
+        self.max_in_flight = max_in_flight or self.DEFAULT_MAX_IN_FLIGHT
         self.tasks: Optional[List[Coroutine]] = list()
         self._paging_client = paging_client
         self._iter: Optional[Iterator] = None
@@ -117,19 +173,25 @@ class Pager:
 
         async def _await_all_pages():
             """get all pages of data concurrently"""
-            pages = await asyncio.gather(*self.tasks)
-            self.data = list()
-            for page in pages:
-                self.data.extend(
-                    self._paging_client.pager_page_data(pager=self, page=page)
-                )
+            pages = await asyncio.gather(*self._bounded_tasks())
+            page_data = self._paging_client.pager_page_data
+            self.data = list(
+                chain.from_iterable(page_data(pager=self, page=page) for page in pages)
+            )
             return pager.data
 
         return _await_all_pages().__await__()
 
+    def _bounded_tasks(self) -> List[Coroutine]:
+        """
+        Returns the page tasks wrapped so that no more than max_in_flight of
+        the page requests are awaited at any one time.
+        """
+        return bounded_calls(self.tasks, self.max_in_flight)
+
     async def __anext__(self):
         """get next page"""
-        if not (job := next(self._iter, None)):
+        if (job := next(self._iter, None)) is None:
             raise StopAsyncIteration
 
         res = await job
@@ -138,8 +200,12 @@ class Pager:
         return self.data
 
     def __aiter__(self):
-        """create async iterator by running jobs through as-completed"""
-        self._iter = asyncio.as_completed(self.tasks)
+        """
+        create async iterator by running jobs through as-completed.  The page
+        requests are started right away, up to max_in_flight, so that the next
+        pages are being fetched while the Caller processes the current page.
+        """
+        self._iter = asyncio.as_completed(self._bounded_tasks())
         return self
 
 
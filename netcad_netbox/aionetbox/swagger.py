@@ -13,10 +13,27 @@
 #  limitations under the License.
 
 from typing import Callable, Optional
-import json
+from pathlib import Path
 
 import httpx
 
+# the swagger spec files are several MB; use orjson, when installed, since it
+# parses them considerably faster than the standard library json module.  When
+# installed, orjson is also used to encode the API request body payloads.
+
+from .json_codec import json_loads, json_dumps
+
+# the operational-ID suffixes that were renamed in NetBox 3.5, for example
+# "dcim_cables_delete" became "dcim_cables_destroy".  Each is aliased in both
+# directions so that either name can be used with any spec version.
+
+OPER_ID_SUFFIX_ALIASES = {
+    "_delete": "_destroy",
+    "_destroy": "_delete",
+    "_read": "_retrieve",
+    "_retrieve": "_read",
+}
+
 
 class SwaggerExecutor:
     """
@@ -28,8 +45,17 @@ class SwaggerExecutor:
         client.op.dcim_devices_list(params=dict(site='my-site-slug'))
         client.op.dcim_cables_delete(id=123)
         client.op.dcim_cables_create(json=new_cable_payload)
+
+    The spec files are parsed and loaded once per process, and shared by all
+    instances that use the same spec file.
     """
 
+    # the loaded spec files; key=(file-path, file-mtime),
+    # value=(spec_data, oper_id_specs, oper_path_args).  The shared values must
+    # not be modified.
+
+    _spec_cache: dict[tuple[str, float], tuple[dict, dict, dict]] = dict()
+
     def __init__(
         self,
         client: httpx.AsyncClient,
@@ -41,12 +67,32 @@ class SwaggerExecutor:
         """
         self.client = client
         self.oper_id_specs = dict()
-        self.spec_data: dict = specdata or json.load(open(specfile))
-        self.load(self.spec_data)
+        self.oper_path_args: dict[str, frozenset[str]] = dict()
+
+        if specdata:
+            self.spec_data = specdata
+            self.load(self.spec_data)
+            return
+
+        spec_path = Path(specfile).resolve()
+        cache_key = (str(spec_path), spec_path.stat().st_mtime)
+
+        if not (cached := self._spec_cache.get(cache_key)):
+            self.spec_data = json_loads(spec_path.read_bytes())
+            self.load(self.spec_data)
+            cached = self._spec_cache[cache_key] = (
+                self.spec_data,
+                self.oper_id_specs,
+                self.oper_path_args,
+            )
+
+        self.spec_data, self.oper_id_specs, self.oper_path_args = cached
 
     def load(self, spec_data: dict):
         """Used to load the swagger data for future processing"""
         for api_path, api_body in spec_data["paths"].items():
+            path_params = api_body.get("parameters", [])
+
             for path_op, path_body in api_body.items():
                 if not isinstance(path_body, dict):
                     continue
@@ -58,6 +104,29 @@ class SwaggerExecutor:
 
                 self.oper_id_specs[oper_id] = (path_op, api_path)
 
+                # the names of the parameters that are part of the URL path,
+                # for example "id"; defined by the operation or by the path.
+
+                self.oper_path_args[oper_id] = frozenset(
+                    _op["name"]
+                    for _op in path_body.get("parameters", []) + path_params
+                    if _op["in"] == "path"
+                )
+
+        self._add_aliases()
+
+    def _add_aliases(self):
+        """adds the OPER_ID_SUFFIX_ALIASES names that the spec does not define"""
+        for oper_id in list(self.oper_id_specs):
+            for suffix, alt_suffix in OPER_ID_SUFFIX_ALIASES.items():
+                if not oper_id.endswith(suffix):
+                    continue
+
+                alias = oper_id.removesuffix(suffix) + alt_suffix
+                if alias not in self.oper_id_specs:
+                    self.oper_id_specs[alias] = self.oper_id_specs[oper_id]
+                    self.oper_path_args[alias] = self.oper_path_args[oper_id]
+
     def get_oper_spec(self, oper_id):
         """retruns the API spec for the given operational-ID"""
         if not (oper_data := self.oper_id_specs.get(oper_id)):
@@ -87,6 +156,12 @@ class SwaggerExecutor:
 
         oper_cmd, oper_path = self.get_oper_spec(oper_id)
 
+        # resolve the URL path parameter names and the client command method
+        # once, rather than on each API call.
+
+        path_arg_names = self.oper_path_args[oper_id]
+        client_cmd = getattr(self.client, oper_cmd)
+
         # if the API path contains parameters, then return a decorator so that
         # the URL path parameters can be passed in by the Caller.
 
@@ -112,21 +187,16 @@ class SwaggerExecutor:
             httpx, for example:
                 op.dcim_interfaces_create(json=new_body_payload)
             """
-            path_data = self.spec_data["paths"][oper_path]
+            pathargs = {name: kwargs.pop(name) for name in path_arg_names}
 
-            oper_params = path_data[oper_cmd].get("parameters", []) + path_data.get(
-                "parameters", []
-            )
-
-            pathargs = {
-                _op["name"]: kwargs.pop(_op["name"])
-                for _op in oper_params
-                if _op["in"] == "path"
-            }
+            if json_dumps and "json" in kwargs:
+                kwargs["content"] = json_dumps(kwargs.pop("json"))
+                kwargs["headers"] = {
+                    "Content-Type": "application/json",
+                    **(kwargs.get("headers") or {}),
+                }
 
-            return await getattr(self.client, oper_cmd)(
-                url=oper_path.format(**pathargs), **kwargs
-            )
+            return await client_cmd(url=oper_path.format_map(pathargs), **kwargs)
 
         # return the coroutine (decorator) that will be used to await on
         # the API call.
@@ -134,5 +204,10 @@ class SwaggerExecutor:
         return call_with_args
 
     def __getattr__(self, oper_id):
-        """Helper to use API operation by name"""
-        return self._get_coro(oper_id)
+        """
+        Helper to use API operation by name.  The coroutine function is stored
+        as an instance attribute so that subsequent uses of the same operation
+        do not call __getattr__ again.
+        """
+        coro = self.__dict__[oper_id] = self._get_coro(oper_id)
+        return coro
@@ -63,8 +63,12 @@ def cli_nb_push(
     nbdev_prop_objs = dict()
 
     for dev in device_objs:
-        nb_design_cfg: NetBoxDesignConfig = dev.design.config["netcad_netbox"]
-        design_insts[dev.design] = nb_design_cfg
+        # the NetBox design config is looked up once per design, rather than
+        # once per device.
+
+        if (nb_design_cfg := design_insts.get(dev.design)) is None:
+            nb_design_cfg = dev.design.config["netcad_netbox"]
+            design_insts[dev.design] = nb_design_cfg
 
         # not all devices in the design could be put into NetBox.
         if not (
@@ -79,25 +83,52 @@ def cli_nb_push(
     # ensure they exist before we start attempting to create devices.
     # -------------------------------------------------------------------------
 
-    nbsite_prop_objs = set()
-    for nb_design in design_insts.values():
-        nbsite_prop_objs.add(nb_design.get_site_properties(status=status))
+    nbsite_prop_objs = {
+        nb_design.get_site_properties(status=status)
+        for nb_design in design_insts.values()
+    }
 
     async def run():
         """run the process in an asyncio context"""
 
         async with NetboxClient() as nb_api:
             # ensure that each of the sites exist in NetBox ... if they do not,
-            # then automatically create them.
-            await nb_sync_sites(nb_api, nbsite_prop_objs)
-
-            # push each of the devices into NetBox.
-            await asyncio.gather(
-                *{
-                    nb_device_push(nb_api, dev_obj, dev_prop_obj, status=status)
+            # then automatically create them.  Each site is synced by its own
+            # task so that the devices of a site are pushed as soon as that
+            # site exists, rather than after all sites exist.
+
+            site_tasks = {
+                site_slug: asyncio.create_task(nb_sync_sites(nb_api, {site_obj}))
+                for site_slug, site_obj in {
+                    site_obj.site: site_obj for site_obj in nbsite_prop_objs
+                }.items()
+            }
+
+            async def push_device(dev_obj, dev_prop_obj):
+                """push the device into NetBox once its site exists"""
+                if site_task := site_tasks.get(dev_prop_obj.site):
+                    await site_task
+
+                await nb_device_push(nb_api, dev_obj, dev_prop_obj, status=status)
+
+            # push each of the devices into NetBox.  If any site sync or device
+            # push fails, then cancel the others before the client is closed.
+
+            push_tasks = [
+                *site_tasks.values(),
+                *(
+                    asyncio.create_task(push_device(dev_obj, dev_prop_obj))
                     for dev_obj, dev_prop_obj in nbdev_prop_objs.items()
-                }
-            )
+                ),
+            ]
+
+            try:
+                await asyncio.gather(*push_tasks)
+            except BaseException:
+                for task in push_tasks:
+                    task.cancel()
+                await asyncio.gather(*push_tasks, return_exceptions=True)
+                raise
 
             if not no_cabling:
                 # ensure cabling is good.
@@ -12,6 +12,12 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import asyncio
+
 # -----------------------------------------------------------------------------
 # Public Imports
 # -----------------------------------------------------------------------------
@@ -72,15 +78,18 @@ async def nb_device_push(
 
     if not nb_dev_rec:
         log.error(f"{dev.name}: aborting further NetBox push due to prior errors.")
+        return
 
     nb_dev_if_map = await device_sync.nb_sync_device_interface_objs(
         nb_api, dev, nb_dev_rec
     )
 
-    await device_sync.nb_sync_device_lag_objs(nb_api, dev, nb_dev_if_map)
+    # the LAG memberships and the IP address assignments only depend on the
+    # interface records, and not on each other; so sync them concurrently.
 
-    nb_dev_if_ipaddr_map = await device_sync.nb_sync_device_ipaddr_objs(
-        nb_api, dev, nb_dev_rec, nb_dev_if_map
+    _, nb_dev_if_ipaddr_map = await asyncio.gather(
+        device_sync.nb_sync_device_lag_objs(nb_api, dev, nb_dev_if_map),
+        device_sync.nb_sync_device_ipaddr_objs(nb_api, dev, nb_dev_rec, nb_dev_if_map),
     )
 
     await device_sync.nb_sync_device_obj_primary_ip(
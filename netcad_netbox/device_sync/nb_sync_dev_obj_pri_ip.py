@@ -80,11 +80,10 @@ async def nb_sync_device_obj_primary_ip(
         return
 
     # If the NetBox device record primary IP is correctly set, then nothing
-    # more to do.
+    # more to do.  The IP address records are compared by ID, rather than by
+    # address string, so that the check does not depend on address formatting.
 
-    if (nb_ip_obj := nb_dev_rec["primary_ip"]) and (
-        nb_ip_obj["address"] == dsn_pri_if_ipaddr
-    ):
+    if (nb_ip_obj := nb_dev_rec["primary_ip"]) and (nb_ip_obj["id"] == nb_ip_rec["id"]):
         return
 
     # if here, then either the primary IP was not set, or the primary IP
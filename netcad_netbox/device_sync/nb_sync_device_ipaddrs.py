@@ -187,7 +187,9 @@ async def _del_if_ipaddrs(
     for if_ipaddr_rec in del_if_ipaddr_recs:
         if_ipaddr = if_ipaddr_rec["address"]
         if_name = if_ipaddr_rec["assigned_object"]["name"]
-        res: Response = await nb_api.op.ipam_ip_addresses_delete(id=if_ipaddr_rec["id"])
+        res: Response = await nb_api.op.ipam_ip_addresses_destroy(
+            id=if_ipaddr_rec["id"]
+        )
 
         if res.is_error:
             log.error(
@@ -17,7 +17,6 @@
 # -----------------------------------------------------------------------------
 
 from httpx import Response
-from first import first
 
 from netcad.device import Device
 from netcad.logger import get_logger
@@ -61,13 +60,13 @@ async def nb_sync_device_obj(
     res: Response = await nb_api.op.dcim_devices_list(params=dict(name=dev.name))
     res.raise_for_status()
 
-    if not (nb_dev_rec := first(res.json()["results"])):
+    if not (nb_dev_recs := res.json()["results"]):
         return await nb_create_new_device_obj(nb_api, dev, dev_prop_obj)
 
     # if we are here, then the device record exists, and we should check to see
     # if the properties match our expected values.
 
-    return await nb_sync_existing_device_obj(nb_api, dev, status, nb_dev_rec)
+    return await nb_sync_existing_device_obj(nb_api, dev, status, nb_dev_recs[0])
 
 
 # =============================================================================
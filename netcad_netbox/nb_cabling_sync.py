@@ -17,6 +17,8 @@
 # -----------------------------------------------------------------------------
 
 import asyncio
+from collections import defaultdict
+from itertools import chain, repeat
 from typing import Iterable
 
 # -----------------------------------------------------------------------------
@@ -24,15 +26,15 @@ from typing import Iterable
 # -----------------------------------------------------------------------------
 
 from httpx import Response
-from first import first
 from netcad.logger import get_logger
-from netcad.device import Device, DeviceInterface
+from netcad.device import Device
 
 # -----------------------------------------------------------------------------
 # Priavte Imports
 # -----------------------------------------------------------------------------
 
-from .aionetbox import NetboxClient
+from .aionetbox import NetboxClient, Pager
+from .aionetbox import nb_fetch
 from .netbox_design_config import NetBoxDeviceProperties
 
 # -----------------------------------------------------------------------------
@@ -47,6 +49,14 @@ __all__ = ["nb_cabling_sync"]
 #
 # -----------------------------------------------------------------------------
 
+# the maximum number of concurrent cable create/delete requests.
+
+CABLING_CONCURRENCY = 16
+
+# the maximum number of cables created by a single bulk-create request.
+
+CABLING_BULK_SZ = 100
+
 
 async def nb_cabling_sync(
     nb_api: NetboxClient, device_prop_objs: dict[Device, NetBoxDeviceProperties]
@@ -69,59 +79,52 @@ async def nb_cabling_sync(
     # Formulate the design cabling map from the list of provided devices.
     # -------------------------------------------------------------------------
 
-    def cable_key(if_obj: DeviceInterface):
-        """
-        sorted key for cable-map.
-
-        If either of the endpoint devices are not in the allowed devices names,
-        meaning these are devices not expected in NetBox, then return 'None' to
-        prevent a cable action to a non-existing device.
-        """
-        if if_obj.device.name not in allowed_device_names:
-            return None
+    # each cable is keyed by the sorted pair of its end-points, each end-point
+    # is (device-name, interface-name), so that the cable is included once
+    # regardless of which end is found first.  If the remote end device is not
+    # in the allowed devices names, meaning a device not expected in NetBox,
+    # then the cable is skipped to prevent a cable action to a non-existing
+    # device.
 
-        _rmt_if_obj: DeviceInterface = if_obj.cable_peer
+    dev_cables: set[tuple[tuple[str, str], tuple[str, str]]] = set()
 
-        if _rmt_if_obj.device.name not in allowed_device_names:
-            return None
+    for dev_obj in device_prop_objs:
+        dev_name = dev_obj.name
 
-        _if_key = (if_obj.device.name, if_obj.name)
-        _rmt_key = (_rmt_if_obj.device.name, _rmt_if_obj.name)
-        return tuple(sorted((_if_key, _rmt_key)))
+        for interface in dev_obj.interfaces.values():
+            if not (rmt_if_obj := interface.cable_peer) or interface.profile.is_lag:
+                continue
 
-    dev_cables = set()
+            if (rmt_dev_name := rmt_if_obj.device.name) not in allowed_device_names:
+                continue
 
-    for dev_obj in device_prop_objs.keys():
-        dev_cables.update(
-            {
-                cable_key(interface)
-                for interface in dev_obj.interfaces.values()
-                if interface.cable_peer and not interface.profile.is_lag
-            }
-        )
-
-    # noinspection PyTypeChecker
-    dev_cables.discard(None)
+            if_key = (dev_name, interface.name)
+            rmt_key = (rmt_dev_name, rmt_if_obj.name)
+            dev_cables.add((if_key, rmt_key) if if_key < rmt_key else (rmt_key, if_key))
 
     # -------------------------------------------------------------------------
-    # Fetch all of the NetBox device records
+    # Fetch all of the NetBox interface records of the cabled devices.  Rather
+    # than fetch each interface record one at a time, the interface records
+    # are fetched using multi-value "device" filter requests.
     # -------------------------------------------------------------------------
 
-    tasks = []
-    for lcl_key, rmt_key in dev_cables:
-        tasks.append(
-            nb_api.op.dcim_interfaces_list(
-                params=dict(device=lcl_key[0], name=lcl_key[1])
-            )
-        )
-        tasks.append(
-            nb_api.op.dcim_interfaces_list(
-                params=dict(device=rmt_key[0], name=rmt_key[1])
+    if_keys = {if_key for cable in dev_cables for if_key in cable}
+    dev_names = sorted({dev_name for dev_name, _ in if_keys})
+    chunk_sz = nb_fetch.FILTER_CHUNK_SZ
+
+    log.info(
+        f"Fetching interface records for {len(dev_names)} devices, please be patient ..."
+    )
+
+    dev_if_recs = await asyncio.gather(
+        *(
+            Pager(nb_api).all(
+                nb_api.op.dcim_interfaces_list,
+                params=dict(device=dev_names[offset : offset + chunk_sz]),
             )
+            for offset in range(0, len(dev_names), chunk_sz)
         )
-
-    log.info(f"Fetching {len(tasks)} interface records, please be patient ...")
-    dev_if_rec_resps = await asyncio.gather(*tasks)
+    )
 
     # -------------------------------------------------------------------------
     # Formulate the NetBox interface mapping lookup
@@ -129,17 +132,31 @@ async def nb_cabling_sync(
 
     dev_if_rec_map = {}
 
-    each_res: Response
-    for each_res in dev_if_rec_resps:
-        if not (if_rec := first(each_res.json()["results"])):
-            u_parms = each_res.request.url.params
-            r_dev_n, r_if_n = u_parms["device"], u_parms["name"]
-            log.error(
-                f"{r_dev_n}:{r_if_n} interface missing from NetBox, please check."
-            )
+    # the existing NetBox cables, each as an ordered (if_key, peer_key) pair in
+    # the same form as dev_cables; so that the cables that are already correct
+    # can be skipped with a single set check.
+
+    nb_cables = set()
+
+    for if_rec in chain.from_iterable(dev_if_recs):
+        if (if_key := (if_rec["device"]["name"], if_rec["name"])) not in if_keys:
             continue
 
-        dev_if_rec_map[(if_rec["device"]["name"], if_rec["name"])] = if_rec
+        dev_if_rec_map[if_key] = if_rec
+
+        # only interface peers are recorded; e.g. a circuit termination peer
+        # has no device.
+
+        if (link_peers := if_rec["link_peers"]) and (
+            if_rec["link_peers_type"] == "dcim.interface"
+        ):
+            peer_key = (link_peers[0]["device"]["name"], link_peers[0]["name"])
+            nb_cables.add(
+                (if_key, peer_key) if if_key < peer_key else (peer_key, if_key)
+            )
+
+    for r_dev_n, r_if_n in sorted(if_keys - dev_if_rec_map.keys()):
+        log.error(f"{r_dev_n}:{r_if_n} interface missing from NetBox, please check.")
 
     # -------------------------------------------------------------------------
     # Formulate cabling actions.
@@ -148,9 +165,20 @@ async def nb_cabling_sync(
     add_cables = set()
     del_cables = set()
 
-    for lcl_key, rmt_key in dev_cables:
-        lcl_if_rec = dev_if_rec_map.get(lcl_key)
-        rmt_if_rec = dev_if_rec_map.get(rmt_key)
+    # the cables to update; key=cable-id, value=list of wanted cable end-points
+
+    upd_cables: dict[int, list] = defaultdict(list)
+
+    # local references for the methods used within the loop, since the loop
+    # runs once per cable in the design.
+
+    get_if_rec = dev_if_rec_map.get
+    add_cable = add_cables.add
+    del_cable = del_cables.add
+
+    for lcl_key, rmt_key in dev_cables - nb_cables:
+        lcl_if_rec = get_if_rec(lcl_key)
+        rmt_if_rec = get_if_rec(rmt_key)
 
         if not all((lcl_if_rec, rmt_if_rec)):
             continue
@@ -159,47 +187,73 @@ async def nb_cabling_sync(
         # exist, then remove the cable.
 
         if rmt_if_rec["cable"] and not rmt_if_rec["link_peers"]:
-            del_cables.add(rmt_key)
+            del_cable(rmt_key)
 
         if lcl_if_rec["cable"] and not lcl_if_rec["link_peers"]:
-            del_cables.add(lcl_key)
+            del_cable(lcl_key)
 
         # if the link-peer does not exist then add
 
-        if not (has_link_peer_obj := first(lcl_if_rec["link_peers"])):
-            add_cables.add((lcl_key, rmt_key))
+        if not (link_peers := lcl_if_rec["link_peers"]):
+            add_cable((lcl_key, rmt_key))
             continue
 
-        has_link_peer_key = (
-            has_link_peer_obj["device"]["name"],
-            has_link_peer_obj["name"],
-        )
-
         # if the link-peer exists and is correct, then no further action is
         # needed
 
-        if has_link_peer_key == rmt_key:
+        if ((peer := link_peers[0])["device"]["name"], peer["name"]) == rmt_key:
             continue
 
-        # if here, then the link-peer exists but is connected to the wrong place.
+        # if here, then the link-peer exists but is connected to the wrong
+        # place.  Rather than remove and re-create the cable, the existing
+        # cable is updated to terminate on the remote interface; any cable on
+        # the remote interface must first be removed.
+
+        if rmt_if_rec["cable"]:
+            del_cable(rmt_key)
+
+        upd_cables[lcl_if_rec["cable"]["id"]].append((lcl_key, rmt_key))
+
+    # a cable can only be updated if it is wanted in exactly one place, and is
+    # not also being removed; otherwise the cable is removed and each of the
+    # wanted cables are created.
 
-        del_cables.add(lcl_key)
-        del_cables.add(rmt_key)
-        add_cables.add((lcl_key, rmt_key))
+    del_cable_ids = {dev_if_rec_map[if_key]["cable"]["id"] for if_key in del_cables}
 
-    if not (del_cables or add_cables):
+    for cable_id, cable_ends in list(upd_cables.items()):
+        if len(cable_ends) == 1 and cable_id not in del_cable_ids:
+            continue
+
+        del upd_cables[cable_id]
+        del_cable_ids.add(cable_id)
+        del_cables.add(cable_ends[0][0])
+        add_cables.update(cable_ends)
+
+    if not (del_cables or upd_cables or add_cables):
         log.info("No cable changes required.")
         return
 
     if del_cables:
-        log.info(f"Removing {len(del_cables)} cables ...")
+        log.info(f"Removing {len(del_cable_ids)} cables ...")
         await _del_cabling(nb_api, map(dev_if_rec_map.get, del_cables))
 
+    if upd_cables:
+        log.info(f"Updating {len(upd_cables)} cables ...")
+        await _update_cabling(nb_api, upd_cables, dev_if_rec_map)
+
     if add_cables:
         log.info(f"Adding {len(add_cables)} cables ...")
         await _add_cabling(nb_api, add_cables, dev_if_rec_map)
 
 
+def _cable_terminations(lcl_if_rec: dict, rmt_if_rec: dict) -> dict:
+    """returns the cable body terminations for the given interface records"""
+    return dict(
+        a_terminations=[dict(object_type="dcim.interface", object_id=lcl_if_rec["id"])],
+        b_terminations=[dict(object_type="dcim.interface", object_id=rmt_if_rec["id"])],
+    )
+
+
 # -----------------------------------------------------------------------------
 #
 #                    Add NetBox Interface Cabling
@@ -229,23 +283,56 @@ async def _add_cabling(
         tuple (device-name, interface-name)
     """
     log = get_logger()
+    add_cables = list(add_cables)
+
+    # TODO: could cable the 'type' field to the cable create.
 
-    for lcl_key, rmt_key in add_cables:
-        lcl_if_rec = dev_if_rec_map[lcl_key]
-        rmt_if_rec = dev_if_rec_map[rmt_key]
+    new_cable_bodies = [
+        _cable_terminations(dev_if_rec_map[lcl_key], dev_if_rec_map[rmt_key])
+        for lcl_key, rmt_key in add_cables
+    ]
 
-        # TODO: could cable the 'type' field to the cable create.
+    # create the cables using bulk-create requests, each containing a list of
+    # cable bodies.
 
-        new_cable_body = dict(
-            a_terminations=[
-                dict(object_type="dcim.interface", object_id=lcl_if_rec["id"])
-            ],
-            b_terminations=[
-                dict(object_type="dcim.interface", object_id=rmt_if_rec["id"])
-            ],
+    chunk_offsets = range(0, len(new_cable_bodies), CABLING_BULK_SZ)
+    bulk_results = await nb_api.batch(
+        (
+            nb_api.op.dcim_cables_create(
+                json=new_cable_bodies[offset : offset + CABLING_BULK_SZ]
+            )
+            for offset in chunk_offsets
+        ),
+        max_concurrency=CABLING_CONCURRENCY,
+    )
+
+    # NetBox creates the cables of a bulk-create request atomically; if any
+    # one cable is rejected, then none are created.  The cables of a failed
+    # request are retried one at a time so that each failure is reported
+    # against its own cable.
+
+    results = list()
+    retry_indexes = list()
+
+    for offset, res in zip(chunk_offsets, bulk_results):
+        chunk_sz = min(CABLING_BULK_SZ, len(new_cable_bodies) - offset)
+        results.extend(repeat(res, chunk_sz))
+        if res.is_error:
+            retry_indexes.extend(range(offset, offset + chunk_sz))
+
+    if retry_indexes:
+        retry_results = await nb_api.batch(
+            (
+                nb_api.op.dcim_cables_create(json=new_cable_bodies[index])
+                for index in retry_indexes
+            ),
+            max_concurrency=CABLING_CONCURRENCY,
         )
+        for index, res in zip(retry_indexes, retry_results):
+            results[index] = res
 
-        res: Response = await nb_api.op.dcim_cables_create(json=new_cable_body)
+    res: Response
+    for (lcl_key, rmt_key), res in zip(add_cables, results):
         lcl_devn, lcl_ifn = lcl_key
         rmt_devn, rmt_ifn = rmt_key
 
@@ -258,6 +345,65 @@ async def _add_cabling(
         log.info(f"{lcl_devn}:{lcl_ifn} cabled {rmt_devn}:{rmt_ifn} OK")
 
 
+# -----------------------------------------------------------------------------
+#
+#                    Update NetBox Interface Cabling
+#
+# -----------------------------------------------------------------------------
+
+
+async def _update_cabling(
+    nb_api: NetboxClient,
+    upd_cables: dict[int, list[tuple[tuple[str, str], tuple[str, str]]]],
+    dev_if_rec_map: dict[tuple[str, str], dict],
+):
+    """
+    This function is used to update existing NetBox cables, that are connected
+    to the wrong place, so that they terminate on the interfaces defined in the
+    NetCAD design.
+
+    Parameters
+    ----------
+    nb_api:
+        Instance to the NetBox API.
+
+    upd_cables:
+        The cables to update; key is the NetBox cable ID, value is the list
+        containing the one cabling end-point keys, each (device-name,
+        interface-name).
+
+    dev_if_rec_map:
+        The dictionary of NetBox device interface records that are keyed by the
+        tuple (device-name, interface-name)
+    """
+    log = get_logger()
+    upd_cable_ends = list()
+    upd_cable_calls = list()
+
+    for cable_id, ((lcl_key, rmt_key),) in upd_cables.items():
+        upd_cable_ends.append((lcl_key, rmt_key))
+        upd_cable_calls.append(
+            nb_api.op.dcim_cables_partial_update(
+                id=cable_id,
+                json=_cable_terminations(
+                    dev_if_rec_map[lcl_key], dev_if_rec_map[rmt_key]
+                ),
+            )
+        )
+
+    results = await nb_api.batch(upd_cable_calls, max_concurrency=CABLING_CONCURRENCY)
+
+    res: Response
+    for ((lcl_devn, lcl_ifn), (rmt_devn, rmt_ifn)), res in zip(upd_cable_ends, results):
+        if res.is_error:
+            log.error(
+                f"{lcl_devn}:{lcl_ifn} re-cabling {rmt_devn}:{rmt_ifn} failed: {res.text}"
+            )
+            continue
+
+        log.info(f"{lcl_devn}:{lcl_ifn} re-cabled {rmt_devn}:{rmt_ifn} OK")
+
+
 # -----------------------------------------------------------------------------
 #
 #                    Delete NetBox Interface Cabling
@@ -282,17 +428,27 @@ async def _del_cabling(nb_api: NetboxClient, del_cable_if_recs: Iterable[dict]):
 
     log = get_logger()
 
-    for if_rec in del_cable_if_recs:
-        dev_name = if_rec["device"]["name"]
-        if_name = if_rec["name"]
+    # both ends of a cable may be given; the cable is only removed once, and
+    # is reported against the first interface given.
+
+    del_cable_if_map = dict()
 
+    for if_rec in del_cable_if_recs:
         if not (if_cable := if_rec["cable"]):
+            dev_name, if_name = if_rec["device"]["name"], if_rec["name"]
             log.warning(f"{dev_name}:{if_name} no cable to remove, skipping")
             continue
 
-        cable_id = if_cable["id"]
+        del_cable_if_map.setdefault(if_cable["id"], if_rec)
+
+    results = await nb_api.batch(
+        (nb_api.op.dcim_cables_destroy(id=cable_id) for cable_id in del_cable_if_map),
+        max_concurrency=CABLING_CONCURRENCY,
+    )
 
-        res: Response = await nb_api.op.dcim_cables_delete(id=cable_id)
+    res: Response
+    for if_rec, res in zip(del_cable_if_map.values(), results):
+        dev_name, if_name = if_rec["device"]["name"], if_rec["name"]
 
         if res.is_error:
             log.error(f"{dev_name}:{if_name} failed to remove cable: {res.text}")
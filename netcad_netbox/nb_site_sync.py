@@ -22,7 +22,6 @@ import asyncio
 # Public Imports
 # -----------------------------------------------------------------------------
 
-from first import first
 from netcad.logger import get_logger
 
 # -----------------------------------------------------------------------------
@@ -56,12 +55,13 @@ async def nb_sync_sites(nb_api, sites: set[NetBoxSiteProperties]):
     # determine which sites need to be created by checking the existing set in
     # netbox.
 
-    known_site_slugs = set(
-        first(res.json()["results"], default={}).get("slug")
+    known_site_slugs = {
+        results[0]["slug"]
         for res in await asyncio.gather(
             *(nb_api.op.dcim_sites_list(params=dict(slug=site.site)) for site in sites)
         )
-    )
+        if (results := res.json()["results"])
+    }
 
     # determine the set of sites that need to be created
 